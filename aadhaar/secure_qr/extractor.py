@@ -1,14 +1,19 @@
-import re
 import zlib
 from abc import ABC
 from abc import abstractmethod
 from base64 import b64encode
 from dataclasses import asdict
 from dataclasses import dataclass
+from dataclasses import field
 from datetime import date
 from datetime import datetime
 from io import BytesIO
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Callable
 from typing import Optional
+from typing import Protocol
+from typing import TypeVar
 from typing import Union
 
 from PIL import Image
@@ -21,6 +26,17 @@ from aadhaar.secure_qr.utilities import generate_sha256_hexdigest
 
 _SECURE_QR_ENCODING = "ISO-8859-1"
 
+_T = TypeVar("_T")
+
+
+class StageHook(Protocol):
+    def __call__(self, name: str, stage: Callable[[], _T]) -> _T:
+        ...
+
+
+def _run_stage(name: str, stage: Callable[[], _T]) -> _T:
+    return stage()
+
 
 @dataclass(frozen=True)
 class ReferenceId:
@@ -109,16 +125,160 @@ class ContactData:
         return {"email": self.email.to_dict(), "mobile": self.mobile.to_dict()}
 
 
+_REFERENCE_ID_FORMAT = "%Y%m%d%H%M%S%f"
+_DATE_OF_BIRTH_FORMAT = "%d-%m-%Y"
+
+
+def _parse_timestamp(text: str) -> datetime:
+    # Millisecond timestamps are sliced directly, anything else, including
+    # values datetime rejects, goes through strptime to keep its behaviour.
+    if len(text) == 17 and text.isdigit():
+        try:
+            return datetime(
+                int(text[:4]),
+                int(text[4:6]),
+                int(text[6:8]),
+                int(text[8:10]),
+                int(text[10:12]),
+                int(text[12:14]),
+                int(text[14:17]) * 1000,
+            )
+        except ValueError:
+            pass
+    return datetime.strptime(text, _REFERENCE_ID_FORMAT)
+
+
+def _parse_reference_id(text: str) -> ReferenceId:
+    return ReferenceId(
+        last_four_aadhaar_digits=text[:4],
+        timestamp=_parse_timestamp(text[4:]),
+    )
+
+
+def _parse_date_of_birth(text: str) -> date:
+    # Zero padded dates are sliced directly, anything else goes through
+    # strptime to keep its behaviour.
+    if (
+        len(text) == 10
+        and text[2] == "-"
+        and text[5] == "-"
+        and text[:2].isdigit()
+        and text[3:5].isdigit()
+        and text[6:].isdigit()
+    ):
+        return date(int(text[6:]), int(text[3:5]), int(text[:2]))
+    return datetime.strptime(text, _DATE_OF_BIRTH_FORMAT).date()
+
+
+_GENDERS = {"m": Gender.MALE, "f": Gender.FEMALE}
+
+
+def _parse_gender(text: str) -> Gender:
+    return _GENDERS.get(text[:1].lower(), Gender.TRANSGENDER)
+
+
+@dataclass(frozen=True)
+class SecureQRLayout:
+    # Positions count the 255 delimited fields of the decompressed data. The
+    # text fields are still mapped by name onto ExtractedTextData, so a layout
+    # can move fields and swap their parsers but cannot add new ones.
+    email_mobile_indicator_position: int
+    text_field_positions: tuple[tuple[str, int], ...]
+    image_position: int
+    parse_reference_id: Callable[[str], ReferenceId]
+    parse_date_of_birth: Callable[[str], date]
+    parse_gender: Callable[[str], Gender]
+
+
+_SECURE_QR_LAYOUT = SecureQRLayout(
+    email_mobile_indicator_position=0,
+    text_field_positions=(
+        ("reference_id", 1),
+        ("name", 2),
+        ("date_of_birth", 3),
+        ("gender", 4),
+        ("care_of", 5),
+        ("district", 6),
+        ("landmark", 7),
+        ("house", 8),
+        ("location", 9),
+        ("pin_code", 10),
+        ("post_office", 11),
+        ("state", 12),
+        ("street", 13),
+        ("sub_district", 14),
+        ("vtc", 15),
+    ),
+    image_position=16,
+    parse_reference_id=_parse_reference_id,
+    parse_date_of_birth=_parse_date_of_birth,
+    parse_gender=_parse_gender,
+)
+
+
 @dataclass(frozen=True)
 class ExtractedSecureQRData:
     text_data: ExtractedTextData
     image: Image.Image
     contact_info: ContactData
+    decompressed_data: Optional[bytes] = field(
+        default=None,
+        compare=False,
+        repr=False,
+    )
+    jpeg_image_data: Optional[bytes] = field(
+        default=None,
+        compare=False,
+        repr=False,
+    )
+    layout: SecureQRLayout = field(
+        default=_SECURE_QR_LAYOUT,
+        compare=False,
+        repr=False,
+    )
+
+    def __reduce__(self) -> Union[str, tuple[Any, ...]]:
+        # Pickling the decoded bitmap is slow and large, ship the decompressed
+        # payload and the encoded JPEG instead whenever they are available.
+        if self.decompressed_data is None or self.jpeg_image_data is None:
+            return super().__reduce__()
+        if self.layout is _SECURE_QR_LAYOUT:
+            return _rebuild_extracted_data, (
+                self.decompressed_data,
+                self.jpeg_image_data,
+            )
+        return _rebuild_extracted_data, (
+            self.decompressed_data,
+            self.jpeg_image_data,
+            self.layout,
+        )
+
+    if not TYPE_CHECKING:
+
+        def __getattr__(self, name: str) -> Any:
+            # Only reached for the fields _rebuild_extracted_data leaves unset,
+            # they are extracted from the payload on first access.
+            if name not in ("text_data", "contact_info"):
+                raise AttributeError(name)
+            data_extractor = SecureQRDataExtractor(
+                self.decompressed_data,
+                self.layout,
+            )
+            object.__setattr__(self, "text_data", data_extractor._make_text_data())
+            object.__setattr__(
+                self,
+                "contact_info",
+                data_extractor._make_contact_data(),
+            )
+            return getattr(self, name)
 
     def _img_to_base64(self) -> str:
-        with BytesIO() as output:
-            self.image.save(output, format="JPEG")
-            image_data = output.getvalue()
+        if self.jpeg_image_data is not None:
+            image_data = self.jpeg_image_data
+        else:
+            with BytesIO() as output:
+                self.image.save(output, format="JPEG")
+                image_data = output.getvalue()
         return "data:image/jpeg;base64," + b64encode(image_data).decode(
             _SECURE_QR_ENCODING,
         )
@@ -161,67 +321,46 @@ class SecureQRCompressedBytesData:
 
 
 class SecureQRDataExtractor:
-    def __init__(self, data: bytes) -> None:
+    def __init__(self, data: bytes, layout: SecureQRLayout = _SECURE_QR_LAYOUT) -> None:
         self._data = data
-        self._details = [
-            "reference_id",
-            "name",
-            "dob",
-            "gender",
-            "care_of",
-            "district",
-            "landmark",
-            "house",
-            "location",
-            "pincode",
-            "post_office",
-            "state",
-            "street",
-            "sub_district",
-            "vtc",
-        ]
+        self._layout = layout
+        # Only the text fields in front of the image are decoded, in one pass.
+        self._text_end = self._find_text_end()
+        self._fields = data[: self._text_end].decode(_SECURE_QR_ENCODING).split("\xff")
+
+    def _find_text_end(self) -> int:
+        index = -1
+        for _ in range(self._layout.image_position):
+            index = self._data.find(255, index + 1)
+            if index == -1:
+                raise MalformedDataReceived(
+                    "Text fields not found, Please provide valid data.",
+                )
+        return index
 
     def _extract_email_mobile_indicator_bit(self) -> int:
-        return int(self._data[0 : self._data.find(255)].decode(_SECURE_QR_ENCODING))
+        return int(self._fields[self._layout.email_mobile_indicator_position])
 
     def _get_email_mobile_indicator(self) -> EmailMobileIndicator:
         return EmailMobileIndicator(self._extract_email_mobile_indicator_bit())
 
-    def _find_indexes_of_255_delimiters(self) -> list[int]:
-        return [index for (index, value) in enumerate(self._data) if value == 255]
-
-    @staticmethod
-    def _make_reference_id(extracted_data: str) -> ReferenceId:
-        return ReferenceId(
-            last_four_aadhaar_digits=extracted_data[:4],
-            timestamp=datetime.strptime(extracted_data[4:], "%Y%m%d%H%M%S%f"),
-        )
-
-    @staticmethod
-    def _select_gender(extracted_data: str) -> Gender:
-        if re.match(pattern=r"m|male", string=extracted_data, flags=re.IGNORECASE):
-            return Gender.MALE
-        elif re.match(pattern=r"f|female", string=extracted_data, flags=re.IGNORECASE):
-            return Gender.FEMALE
-        return Gender.TRANSGENDER
-
     def _make_text_data(self) -> ExtractedTextData:
-        extracted_text_data = self._find_indexes_and_extract_text_data()
+        extracted_text_data = self._extract_text_data()
+        layout = self._layout
         return ExtractedTextData(
             name=extracted_text_data["name"],
-            reference_id=self._make_reference_id(extracted_text_data["reference_id"]),
-            gender=self._select_gender(extracted_text_data["gender"]),
-            date_of_birth=datetime.strptime(
-                extracted_text_data["dob"],
-                "%d-%m-%Y",
-            ).date(),
+            reference_id=layout.parse_reference_id(extracted_text_data["reference_id"]),
+            gender=layout.parse_gender(extracted_text_data["gender"]),
+            date_of_birth=layout.parse_date_of_birth(
+                extracted_text_data["date_of_birth"],
+            ),
             address=Address(
                 care_of=extracted_text_data["care_of"],
                 district=extracted_text_data["district"],
                 landmark=extracted_text_data["landmark"],
                 house=extracted_text_data["house"],
                 location=extracted_text_data["location"],
-                pin_code=extracted_text_data["pincode"],
+                pin_code=extracted_text_data["pin_code"],
                 post_office=extracted_text_data["post_office"],
                 state=extracted_text_data["state"],
                 street=extracted_text_data["street"],
@@ -230,40 +369,38 @@ class SecureQRDataExtractor:
             ),
         )
 
-    def _find_indexes_and_extract_text_data(self) -> dict[str, str]:
-        indexes = self._find_indexes_of_255_delimiters()
-        return self._extract_text_data(indexes[1:])
+    def _extract_text_data(self) -> dict[str, str]:
+        fields = self._fields
+        return {
+            detail: fields[position]
+            for detail, position in self._layout.text_field_positions
+        }
 
-    def _extract_text_data(self, indexes: list[int]) -> dict[str, str]:
-        raw_extracted_data = {}
-        previous = self._data.find(255) + 1
-        for detail, index_position in zip(self._details, indexes):
-            extracted_detail = self._data[previous:index_position].decode(
-                _SECURE_QR_ENCODING,
-            )
-            raw_extracted_data[detail] = extracted_detail
-            previous = index_position + 1
-        return raw_extracted_data
+    @staticmethod
+    def _make_aadhaar_image(jpeg_image_data: bytes) -> Image.Image:
+        # Image.open only parses the JPEG header, pixels are decoded on first
+        # access.
+        return Image.open(BytesIO(jpeg_image_data))
 
-    def _make_aadhaar_image(self) -> Image.Image:
+    def _make_aadhaar_jpeg_image_data(self) -> bytes:
         image_bytes = self._extract_aadhaar_image_data()
         img = Image.open(BytesIO(image_bytes))
-        return self._convert_to_jpeg(img)
+        return self._encode_to_jpeg(img)
 
     def _extract_aadhaar_image_data(self) -> bytes:
         ending = len(self._data) - 256
         length_to_subtract = self._calculate_length_to_subtract()
-        image_bytes = self._data[
-            self._find_indexes_of_255_delimiters()[15] + 1 : ending - length_to_subtract
-        ]
+        image_bytes = self._data[self._find_image_start() : ending - length_to_subtract]
         return image_bytes
 
+    def _find_image_start(self) -> int:
+        return self._text_end + 1
+
     @staticmethod
-    def _convert_to_jpeg(img: Image.Image) -> Image.Image:
+    def _encode_to_jpeg(img: Image.Image) -> bytes:
         with BytesIO() as output:
             img.save(output, format="JPEG")
-            bytes_data = output.getvalue()
-        return Image.open(BytesIO(bytes_data))
+            return output.getvalue()
 
     def _calculate_length_to_subtract(self) -> int:
         email_mobile_indicator_bit = self._get_email_mobile_indicator()
@@ -307,24 +444,67 @@ class SecureQRDataExtractor:
         return None
 
     def _make_contact_data(self) -> ContactData:
-        extracted_text_data = self._find_indexes_and_extract_text_data()
+        fourth_aadhaar_digit = self._extract_text_data()["reference_id"][3]
         return ContactData(
-            Email(self._extract_email_hash(), extracted_text_data["reference_id"][3]),
-            Mobile(self._extract_mobile_hash(), extracted_text_data["reference_id"][3]),
+            Email(self._extract_email_hash(), fourth_aadhaar_digit),
+            Mobile(self._extract_mobile_hash(), fourth_aadhaar_digit),
         )
 
-    def extract(self) -> ExtractedSecureQRData:
+    def extract(self, stage_hook: StageHook = _run_stage) -> ExtractedSecureQRData:
+        return self._make_extracted_secure_qr_data(
+            stage_hook("jpeg_image_data", self._make_aadhaar_jpeg_image_data),
+            stage_hook,
+        )
+
+    def _make_extracted_secure_qr_data(
+        self,
+        jpeg_image_data: bytes,
+        stage_hook: StageHook = _run_stage,
+    ) -> ExtractedSecureQRData:
         return ExtractedSecureQRData(
-            text_data=self._make_text_data(),
-            image=self._make_aadhaar_image(),
-            contact_info=self._make_contact_data(),
+            text_data=stage_hook("text_data", self._make_text_data),
+            image=stage_hook(
+                "image",
+                lambda: self._make_aadhaar_image(jpeg_image_data),
+            ),
+            contact_info=stage_hook("contact_info", self._make_contact_data),
+            decompressed_data=self._data,
+            jpeg_image_data=jpeg_image_data,
+            layout=self._layout,
         )
 
 
-def extract_data(data: int) -> ExtractedSecureQRData:
+def _rebuild_extracted_data(
+    decompressed_data: bytes,
+    jpeg_image_data: bytes,
+    layout: SecureQRLayout = _SECURE_QR_LAYOUT,
+) -> ExtractedSecureQRData:
+    # Text and contact data are left unset and extracted on first access.
+    extracted_data = object.__new__(ExtractedSecureQRData)
+    object.__setattr__(
+        extracted_data,
+        "image",
+        SecureQRDataExtractor._make_aadhaar_image(jpeg_image_data),
+    )
+    object.__setattr__(extracted_data, "decompressed_data", decompressed_data)
+    object.__setattr__(extracted_data, "jpeg_image_data", jpeg_image_data)
+    object.__setattr__(extracted_data, "layout", layout)
+    return extracted_data
+
+
+def extract_data(
+    data: int,
+    stage_hook: StageHook = _run_stage,
+) -> ExtractedSecureQRData:
     scanned_integer = SecureQRCodeScannedInteger(data)
-    integer_to_bytes = scanned_integer.convert_to_bytes()
+    integer_to_bytes = stage_hook(
+        "convert_to_bytes",
+        scanned_integer.convert_to_bytes,
+    )
     compressed_bytes = SecureQRCompressedBytesData(integer_to_bytes)
-    decompressed_bytes = compressed_bytes.decompress()
-    data_extractor = SecureQRDataExtractor(decompressed_bytes)
-    return data_extractor.extract()
+    decompressed_bytes = stage_hook("decompress", compressed_bytes.decompress)
+    data_extractor = stage_hook(
+        "parse_fields",
+        lambda: SecureQRDataExtractor(decompressed_bytes),
+    )
+    return data_extractor.extract(stage_hook)
@@ -0,0 +1,158 @@
+import argparse
+import json
+import sys
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable
+from typing import Optional
+from typing import Sequence
+from typing import TypeVar
+from typing import Union
+
+from aadhaar.secure_qr.extractor import ExtractedSecureQRData
+from aadhaar.secure_qr.extractor import extract_data
+
+_T = TypeVar("_T")
+
+
+@dataclass(frozen=True)
+class StageMemoryUsage:
+    name: str
+    peak_bytes: int
+    retained_bytes: int
+
+    def to_dict(self) -> dict[str, Union[str, int]]:
+        return {
+            "name": self.name,
+            "peak_bytes": self.peak_bytes,
+            "retained_bytes": self.retained_bytes,
+        }
+
+
+@dataclass(frozen=True)
+class ExtractionMemoryProfile:
+    stages: tuple[StageMemoryUsage, ...]
+    peak_bytes: int
+    retained_bytes: int
+    extracted_data: ExtractedSecureQRData
+
+    def to_dict(self) -> dict:
+        return {
+            "stages": [stage.to_dict() for stage in self.stages],
+            "peak_bytes": self.peak_bytes,
+            "retained_bytes": self.retained_bytes,
+        }
+
+
+class _MemoryTracer:
+    # Resets the tracemalloc peak before every stage, so a caller that was
+    # already tracing loses its own peak measurement.
+    def __init__(self) -> None:
+        self._stages: list[StageMemoryUsage] = []
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self._initial_bytes = tracemalloc.get_traced_memory()[0]
+        self._peak_bytes = 0
+
+    def _record_peak(self) -> None:
+        # Covers the untraced work between stages before the peak is reset.
+        self._peak_bytes = max(
+            self._peak_bytes,
+            tracemalloc.get_traced_memory()[1] - self._initial_bytes,
+        )
+
+    def trace(self, name: str, stage: Callable[[], _T]) -> _T:
+        self._record_peak()
+        tracemalloc.reset_peak()
+        bytes_before_stage = tracemalloc.get_traced_memory()[0]
+        stage_output = stage()
+        current_bytes, peak_bytes = tracemalloc.get_traced_memory()
+        self._stages.append(
+            StageMemoryUsage(
+                name=name,
+                peak_bytes=peak_bytes - bytes_before_stage,
+                retained_bytes=current_bytes - bytes_before_stage,
+            ),
+        )
+        return stage_output
+
+    def finish(
+        self,
+        extracted_data: ExtractedSecureQRData,
+    ) -> ExtractionMemoryProfile:
+        self._record_peak()
+        return ExtractionMemoryProfile(
+            stages=tuple(self._stages),
+            peak_bytes=self._peak_bytes,
+            retained_bytes=tracemalloc.get_traced_memory()[0] - self._initial_bytes,
+            extracted_data=extracted_data,
+        )
+
+    def stop(self) -> None:
+        if self._started_tracing:
+            tracemalloc.stop()
+
+
+def profile_extraction(data: int, warm_up: bool = True) -> ExtractionMemoryProfile:
+    # Traces every stage of extract_data through its stage hook, the
+    # text_data, image and contact_info stages report what each result
+    # object retains.
+    if warm_up:
+        # Keeps one-time costs (lazy imports, regex and codec caches) out of
+        # the steady state numbers.
+        extract_data(data)
+    tracer = _MemoryTracer()
+    try:
+        return tracer.finish(extract_data(data, tracer.trace))
+    finally:
+        tracer.stop()
+
+
+def _format_profile(profile: ExtractionMemoryProfile) -> str:
+    lines = [f"{'stage':<20}{'peak bytes':>14}{'retained bytes':>18}"]
+    for stage in profile.stages:
+        lines.append(
+            f"{stage.name:<20}{stage.peak_bytes:>14}{stage.retained_bytes:>18}",
+        )
+    lines.append(
+        f"{'total':<20}{profile.peak_bytes:>14}{profile.retained_bytes:>18}",
+    )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m aadhaar.secure_qr.profiling",
+        description="Report memory used by each stage of Secure QR extraction.",
+    )
+    parser.add_argument(
+        "file",
+        nargs="?",
+        type=argparse.FileType("r"),
+        default=sys.stdin,
+        help="file holding the scanned Secure QR integer, defaults to stdin",
+    )
+    parser.add_argument("--json", action="store_true", help="print JSON output")
+    parser.add_argument(
+        "--cold",
+        action="store_true",
+        help="skip the warm up extraction and include one-time costs",
+    )
+    arguments = parser.parse_args(argv)
+    data_file = arguments.file
+    try:
+        data = int(data_file.read())
+    finally:
+        if data_file is not sys.stdin:
+            data_file.close()
+    profile = profile_extraction(data, warm_up=not arguments.cold)
+    if arguments.json:
+        print(json.dumps(profile.to_dict(), indent=2))
+    else:
+        print(_format_profile(profile))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import _posixshmem  # type: ignore
+import mmap
+import os
+import pickle
+from multiprocessing import shared_memory
+from typing import cast
+
+from aadhaar.secure_qr.extractor import ExtractedSecureQRData
+
+_LENGTH_PREFIX_SIZE = 4
+
+
+def dump_to_shared_memory(
+    extracted_data: ExtractedSecureQRData,
+) -> shared_memory.SharedMemory:
+    pickled_data = pickle.dumps(extracted_data, protocol=pickle.HIGHEST_PROTOCOL)
+    pickled_data_length = len(pickled_data)
+    shm = shared_memory.SharedMemory(
+        create=True,
+        size=_LENGTH_PREFIX_SIZE + pickled_data_length,
+    )
+    try:
+        buffer = cast(memoryview, shm.buf)
+        buffer[:_LENGTH_PREFIX_SIZE] = pickled_data_length.to_bytes(
+            length=_LENGTH_PREFIX_SIZE,
+            byteorder="big",
+        )
+        buffer[
+            _LENGTH_PREFIX_SIZE : _LENGTH_PREFIX_SIZE + pickled_data_length
+        ] = pickled_data
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+    return shm
+
+
+def _map_shared_memory(name: str) -> mmap.mmap:
+    # Attaching through SharedMemory registers the segment with the reader's
+    # resource tracker before Python 3.13, which unlinks it when the reader
+    # exits. The producer owns the segment, so map it directly instead.
+    fd = _posixshmem.shm_open("/" + name, os.O_RDONLY, mode=0o600)
+    try:
+        return mmap.mmap(fd, os.fstat(fd).st_size, prot=mmap.PROT_READ)
+    finally:
+        os.close(fd)
+
+
+def load_from_shared_memory(name: str) -> ExtractedSecureQRData:
+    shared_memory_map = _map_shared_memory(name)
+    try:
+        with memoryview(shared_memory_map) as buffer:
+            with buffer[:_LENGTH_PREFIX_SIZE] as length_prefix:
+                pickled_data_length = int.from_bytes(length_prefix, byteorder="big")
+            with buffer[
+                _LENGTH_PREFIX_SIZE : _LENGTH_PREFIX_SIZE + pickled_data_length
+            ] as pickled_data:
+                extracted_data: ExtractedSecureQRData = pickle.loads(pickled_data)
+    finally:
+        shared_memory_map.close()
+    return extracted_data
@@ -0,0 +1,73 @@
+import pathlib
+import pickle
+import timeit
+from dataclasses import replace
+
+from aadhaar.secure_qr.extractor import ExtractedSecureQRData
+from aadhaar.secure_qr.extractor import extract_data
+from aadhaar.secure_qr.transport import dump_to_shared_memory
+from aadhaar.secure_qr.transport import load_from_shared_memory
+
+_NUMBER_OF_RUNS = 1000
+_TEST_DATA_DIRECTORY = pathlib.Path(__file__).resolve().parent.parent / "test_data"
+
+
+def _prepare_extracted_data() -> ExtractedSecureQRData:
+    with open(
+        _TEST_DATA_DIRECTORY / "secure_qr_sample_integer_data.txt",
+    ) as sample_data_file:
+        return extract_data(int(sample_data_file.read()))
+
+
+def _round_trip_through_pickle(extracted_data: ExtractedSecureQRData) -> None:
+    pickle.loads(pickle.dumps(extracted_data))
+
+
+def _round_trip_through_shared_memory(extracted_data: ExtractedSecureQRData) -> None:
+    shm = dump_to_shared_memory(extracted_data)
+    try:
+        load_from_shared_memory(shm.name)
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _report(label: str, size: int, seconds: float) -> None:
+    print(
+        f"{label:<24}{size:>10} bytes"
+        f"{seconds / _NUMBER_OF_RUNS * 1_000_000:>12.1f} us/round trip",
+    )
+
+
+def main() -> None:
+    payload_data = _prepare_extracted_data()
+    image_data = replace(payload_data, decompressed_data=None, jpeg_image_data=None)
+
+    _report(
+        "pickle (image)",
+        len(pickle.dumps(image_data)),
+        timeit.timeit(
+            lambda: _round_trip_through_pickle(image_data),
+            number=_NUMBER_OF_RUNS,
+        ),
+    )
+    _report(
+        "pickle (payload)",
+        len(pickle.dumps(payload_data)),
+        timeit.timeit(
+            lambda: _round_trip_through_pickle(payload_data),
+            number=_NUMBER_OF_RUNS,
+        ),
+    )
+    _report(
+        "shared memory (payload)",
+        len(pickle.dumps(payload_data, protocol=pickle.HIGHEST_PROTOCOL)),
+        timeit.timeit(
+            lambda: _round_trip_through_shared_memory(payload_data),
+            number=_NUMBER_OF_RUNS,
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
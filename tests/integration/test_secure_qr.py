@@ -1,6 +1,8 @@
 import json
 import pathlib
 import pickle
+import subprocess
+import sys
 from datetime import datetime
 from unittest import TestCase
 
@@ -14,6 +16,8 @@ from aadhaar.secure_qr.extractor import ExtractedTextData
 from aadhaar.secure_qr.extractor import Mobile
 from aadhaar.secure_qr.extractor import ReferenceId
 from aadhaar.secure_qr.extractor import extract_data
+from aadhaar.secure_qr.transport import dump_to_shared_memory
+from aadhaar.secure_qr.transport import load_from_shared_memory
 from tests.test_utils import resolve_test_data_directory_path
 
 
@@ -92,3 +96,39 @@ class TestExtractFromAadhaar(TestCase):
             expected_data = json.load(to_dict_json)
         extracted_data = extract_data(self._prepare_test_qr_code_integer_data())
         self.assertEqual(expected_data, extracted_data.to_dict())
+
+
+class TestSharedMemoryTransportAcrossProcesses(TestCase):
+    def setUp(self) -> None:
+        with open(
+            resolve_test_data_directory_path() / "secure_qr_sample_integer_data.txt",
+        ) as sample_data_file:
+            self.extracted_data = extract_data(int(sample_data_file.read()))
+        self.shm = dump_to_shared_memory(self.extracted_data)
+
+    def tearDown(self) -> None:
+        self.shm.close()
+        self.shm.unlink()
+
+    def test_keeps_shared_memory_when_loaded_from_another_process(self) -> None:
+        project_root = pathlib.Path(resolve_test_data_directory_path()).parent
+        completed_process = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys\n"
+                "from aadhaar.secure_qr.transport import load_from_shared_memory\n"
+                "print(load_from_shared_memory(sys.argv[1]).text_data.name)",
+                self.shm.name,
+            ],
+            cwd=project_root,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        self.assertEqual("Penumarthi Venkat", completed_process.stdout.strip())
+        self.assertNotIn("leaked", completed_process.stderr)
+        self.assertEqual(
+            self.extracted_data,
+            load_from_shared_memory(self.shm.name),
+        )
@@ -1,7 +1,16 @@
 import pathlib
+import pickle
 
 
 def resolve_test_data_directory_path() -> pathlib.PurePath:
     current_file = pathlib.Path(__file__).resolve()
     project_root = current_file.parent.parent
     return project_root / "test_data"
+
+
+def load_secure_qr_sample_bytes_data() -> bytes:
+    with open(
+        resolve_test_data_directory_path() / "secure_qr_sample_bytes_data.pickle",
+        "rb",
+    ) as sample_data_file:
+        return bytes(pickle.load(sample_data_file))
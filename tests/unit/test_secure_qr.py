@@ -1,13 +1,23 @@
+import json
 import pathlib
 import pickle
+import tracemalloc
+from contextlib import redirect_stdout
+from dataclasses import FrozenInstanceError
+from dataclasses import replace
 from datetime import datetime
+from io import StringIO
+from typing import Callable
+from typing import TypeVar
 from unittest import TestCase
+from unittest.mock import patch
 
 from aadhaar.secure_qr.enums import EmailMobileIndicator
 from aadhaar.secure_qr.enums import Gender
 from aadhaar.secure_qr.exceptions import ContactNotFound
 from aadhaar.secure_qr.exceptions import MalformedDataReceived
 from aadhaar.secure_qr.exceptions import NumberOutOfRangeException
+from aadhaar.secure_qr.extractor import _SECURE_QR_LAYOUT
 from aadhaar.secure_qr.extractor import Address
 from aadhaar.secure_qr.extractor import ContactData
 from aadhaar.secure_qr.extractor import Email
@@ -17,9 +27,20 @@ from aadhaar.secure_qr.extractor import ReferenceId
 from aadhaar.secure_qr.extractor import SecureQRCodeScannedInteger
 from aadhaar.secure_qr.extractor import SecureQRCompressedBytesData
 from aadhaar.secure_qr.extractor import SecureQRDataExtractor
+from aadhaar.secure_qr.extractor import _parse_date_of_birth
+from aadhaar.secure_qr.extractor import _parse_gender
+from aadhaar.secure_qr.extractor import _parse_reference_id
+from aadhaar.secure_qr.extractor import extract_data
+from aadhaar.secure_qr.profiling import main
+from aadhaar.secure_qr.profiling import profile_extraction
+from aadhaar.secure_qr.transport import dump_to_shared_memory
+from aadhaar.secure_qr.transport import load_from_shared_memory
 from aadhaar.secure_qr.utilities import generate_sha256_hexdigest
+from tests.test_utils import load_secure_qr_sample_bytes_data
 from tests.test_utils import resolve_test_data_directory_path
 
+_T = TypeVar("_T")
+
 
 class TestGenerateSha256Hexdigest(TestCase):
     def setUp(self) -> None:
@@ -175,15 +196,15 @@ class TestExtractData(TestCase):
             self.extract_data._get_email_mobile_indicator(),
         )
 
-    def test_returns_expected_list_of_255_delimiter_when_called(self) -> None:
-        expected_list_of_255_delimiter = [
+    def test_returns_image_start_after_sixteenth_255_delimiter(self) -> None:
+        indexes_of_255_delimiter = [
             index
             for (index, value) in enumerate(self.sample_bytes_data)
             if value == 255
         ]
         self.assertEqual(
-            expected_list_of_255_delimiter,
-            self.extract_data._find_indexes_of_255_delimiters(),
+            indexes_of_255_delimiter[15] + 1,
+            self.extract_data._find_image_start(),
         )
 
     def test_returns_expected_extracted_text_data(self) -> None:
@@ -219,7 +240,9 @@ class TestExtractData(TestCase):
             "rb",
         ) as pickled_image:
             expected_image = pickle.load(pickled_image)
-        actual_image = self.extract_data._make_aadhaar_image()
+        actual_image = self.extract_data._make_aadhaar_image(
+            self.extract_data._make_aadhaar_jpeg_image_data(),
+        )
         assert actual_image.tobytes() == expected_image.tobytes()
         self.assertEqual(expected_image, actual_image)
 
@@ -245,3 +268,268 @@ class TestExtractData(TestCase):
             ),
         )
         self.assertEqual(contact_data, self.extract_data._make_contact_data())
+
+    def test_runs_every_stage_through_given_stage_hook(self) -> None:
+        stage_names = []
+
+        def record_stage(name: str, stage: Callable[[], _T]) -> _T:
+            stage_names.append(name)
+            return stage()
+
+        self.assertEqual(
+            self.extract_data.extract(),
+            self.extract_data.extract(record_stage),
+        )
+        self.assertEqual(
+            ["jpeg_image_data", "text_data", "image", "contact_info"],
+            stage_names,
+        )
+
+    def test_pickles_extracted_data_as_payload_and_jpeg(self) -> None:
+        extracted_data = self.extract_data.extract()
+        pickled_data = pickle.dumps(extracted_data)
+        self.assertNotIn(extracted_data.image.tobytes(), pickled_data)
+        self.assertLess(
+            len(pickled_data),
+            len(
+                pickle.dumps(
+                    replace(
+                        extracted_data,
+                        decompressed_data=None,
+                        jpeg_image_data=None,
+                    ),
+                ),
+            ),
+        )
+
+    def test_extracts_text_and_contact_data_lazily_when_unpickled(self) -> None:
+        extracted_data = self.extract_data.extract()
+        unpickled_data = pickle.loads(pickle.dumps(extracted_data))
+        self.assertNotIn("text_data", vars(unpickled_data))
+        self.assertNotIn("contact_info", vars(unpickled_data))
+        self.assertEqual(extracted_data.contact_info, unpickled_data.contact_info)
+        self.assertIn("text_data", vars(unpickled_data))
+
+    def test_returns_equal_extracted_data_when_unpickled(self) -> None:
+        extracted_data = self.extract_data.extract()
+        unpickled_data = pickle.loads(pickle.dumps(extracted_data))
+        self.assertEqual(extracted_data, unpickled_data)
+        self.assertEqual(
+            extracted_data.image.tobytes(),
+            unpickled_data.image.tobytes(),
+        )
+
+
+class TestSharedMemoryTransport(TestCase):
+    def setUp(self) -> None:
+        self.extracted_data = SecureQRDataExtractor(
+            load_secure_qr_sample_bytes_data(),
+        ).extract()
+        self.shm = dump_to_shared_memory(self.extracted_data)
+
+    def tearDown(self) -> None:
+        self.shm.close()
+        self.shm.unlink()
+
+    def test_returns_equal_extracted_data_when_loaded_from_shared_memory(
+        self,
+    ) -> None:
+        self.assertEqual(
+            self.extracted_data,
+            load_from_shared_memory(self.shm.name),
+        )
+
+
+class TestProfileExtraction(TestCase):
+    # Per-extraction memory budgets, raise them only for a deliberate change.
+    peak_bytes_budget = 128 * 1024
+    retained_bytes_budget = 16 * 1024
+    stage_retained_bytes_budgets = {
+        "convert_to_bytes": 16 * 1024 + 256,
+        "decompress": 4 * 1024,
+        "parse_fields": 4 * 1024,
+        "jpeg_image_data": 4 * 1024,
+        "text_data": 4 * 1024,
+        "image": 4 * 1024,
+        "contact_info": 4 * 1024,
+    }
+
+    def _prepare_test_qr_code_integer_data_path(self) -> pathlib.PurePath:
+        return resolve_test_data_directory_path() / "secure_qr_sample_integer_data.txt"
+
+    def setUp(self) -> None:
+        with open(self._prepare_test_qr_code_integer_data_path()) as sample_data_file:
+            self.profile = profile_extraction(int(sample_data_file.read()))
+
+    def test_reports_every_pipeline_stage(self) -> None:
+        self.assertEqual(
+            list(self.stage_retained_bytes_budgets),
+            [stage.name for stage in self.profile.stages],
+        )
+
+    def test_stops_tracing_when_it_started_tracing(self) -> None:
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_stops_tracing_when_extraction_fails(self) -> None:
+        with self.assertRaises(MalformedDataReceived):
+            profile_extraction(12345, warm_up=False)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_keeps_tracing_when_caller_started_tracing(self) -> None:
+        tracemalloc.start()
+        try:
+            with open(
+                self._prepare_test_qr_code_integer_data_path(),
+            ) as sample_data_file:
+                profile_extraction(int(sample_data_file.read()), warm_up=False)
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+
+    def test_returns_extracted_data_equal_to_extract_data(self) -> None:
+        with open(self._prepare_test_qr_code_integer_data_path()) as sample_data_file:
+            expected_data = extract_data(int(sample_data_file.read()))
+        self.assertEqual(expected_data, self.profile.extracted_data)
+
+    def test_stays_within_peak_bytes_budget(self) -> None:
+        self.assertLessEqual(self.profile.peak_bytes, self.peak_bytes_budget)
+
+    def test_stays_within_retained_bytes_budget(self) -> None:
+        self.assertLessEqual(self.profile.retained_bytes, self.retained_bytes_budget)
+
+    def test_stays_within_stage_retained_bytes_budgets(self) -> None:
+        for stage in self.profile.stages:
+            with self.subTest(stage=stage.name):
+                self.assertLessEqual(
+                    stage.retained_bytes,
+                    self.stage_retained_bytes_budgets[stage.name],
+                )
+
+    def test_reports_peak_bytes_of_every_stage_in_total(self) -> None:
+        self.assertGreaterEqual(
+            self.profile.peak_bytes,
+            max(stage.peak_bytes for stage in self.profile.stages),
+        )
+
+    def test_keeps_stdin_open_when_reading_from_it(self) -> None:
+        with open(self._prepare_test_qr_code_integer_data_path()) as sample_data_file:
+            stdin = StringIO(sample_data_file.read())
+        with patch("sys.stdin", stdin), redirect_stdout(StringIO()):
+            main([])
+        self.assertFalse(stdin.closed)
+
+    def test_prints_json_profile_from_command_line(self) -> None:
+        with redirect_stdout(StringIO()) as output:
+            main([self._prepare_test_qr_code_integer_data_path().as_posix(), "--json"])
+        self.assertEqual(
+            [stage.name for stage in self.profile.stages],
+            [stage["name"] for stage in json.loads(output.getvalue())["stages"]],
+        )
+
+
+class TestSecureQRLayout(TestCase):
+    def test_parses_reference_id_same_as_strptime(self) -> None:
+        for timestamp in (
+            "20190305150137123",
+            "20190305150137",
+            "201903051501371",
+            "20190305150137123456",
+            "20191305150137123",
+            "20190332150137123",
+        ):
+            with self.subTest(timestamp=timestamp):
+                self.assertEqual(
+                    datetime.strptime(timestamp, "%Y%m%d%H%M%S%f"),
+                    _parse_reference_id("8908" + timestamp).timestamp,
+                )
+
+    def test_raises_value_error_when_given_malformed_reference_id(self) -> None:
+        for timestamp in (
+            "20190305150137123456789",
+            "+0190305150137123",
+            " 2019030515013712",
+            "2019_305150137123",
+            "20190230150137123",
+        ):
+            with self.subTest(timestamp=timestamp):
+                with self.assertRaises(ValueError):
+                    _parse_reference_id("8908" + timestamp)
+
+    def test_parses_date_of_birth_same_as_strptime(self) -> None:
+        for date_of_birth in ("07-05-1987", "7-5-1987", "07-5-1987"):
+            with self.subTest(date_of_birth=date_of_birth):
+                self.assertEqual(
+                    datetime.strptime(date_of_birth, "%d-%m-%Y").date(),
+                    _parse_date_of_birth(date_of_birth),
+                )
+
+    def test_raises_value_error_when_given_malformed_date_of_birth(self) -> None:
+        for date_of_birth in (
+            "07/05/1987",
+            "07-05-1987xyz",
+            "07-13-1987",
+            "+7-05-1987",
+        ):
+            with self.subTest(date_of_birth=date_of_birth):
+                with self.assertRaises(ValueError):
+                    _parse_date_of_birth(date_of_birth)
+
+    def test_selects_gender_from_first_letter(self) -> None:
+        for text, gender in (
+            ("M", Gender.MALE),
+            ("male", Gender.MALE),
+            ("F", Gender.FEMALE),
+            ("Female", Gender.FEMALE),
+            ("T", Gender.TRANSGENDER),
+            ("", Gender.TRANSGENDER),
+        ):
+            with self.subTest(text=text):
+                self.assertEqual(gender, _parse_gender(text))
+
+    def test_is_hashable_and_immutable(self) -> None:
+        self.assertEqual(hash(_SECURE_QR_LAYOUT), hash(replace(_SECURE_QR_LAYOUT)))
+        with self.assertRaises(FrozenInstanceError):
+            _SECURE_QR_LAYOUT.image_position = 17  # type: ignore
+
+    def test_returns_equal_extracted_data_when_unpickled_with_given_layout(
+        self,
+    ) -> None:
+        positions = dict(_SECURE_QR_LAYOUT.text_field_positions)
+        positions["house"], positions["street"] = (
+            positions["street"],
+            positions["house"],
+        )
+        layout = replace(
+            _SECURE_QR_LAYOUT,
+            text_field_positions=tuple(positions.items()),
+        )
+        extracted_data = SecureQRDataExtractor(
+            load_secure_qr_sample_bytes_data(),
+            layout,
+        ).extract()
+        unpickled_data = pickle.loads(pickle.dumps(extracted_data))
+        self.assertEqual(extracted_data, unpickled_data)
+        self.assertEqual("Main Road", unpickled_data.text_data.address.house)
+
+    def test_raises_exception_when_text_fields_are_missing(self) -> None:
+        with self.assertRaises(MalformedDataReceived):
+            SecureQRDataExtractor(b"2\xff8908\xffPenumarthi")
+
+    def test_extracts_text_data_using_given_layout(self) -> None:
+        positions = dict(_SECURE_QR_LAYOUT.text_field_positions)
+        positions["house"], positions["street"] = (
+            positions["street"],
+            positions["house"],
+        )
+        layout = replace(
+            _SECURE_QR_LAYOUT,
+            text_field_positions=tuple(positions.items()),
+            parse_gender=lambda text: Gender.TRANSGENDER,
+        )
+        text_data = SecureQRDataExtractor(
+            load_secure_qr_sample_bytes_data(),
+            layout,
+        )._make_text_data()
+        self.assertEqual(Gender.TRANSGENDER, text_data.gender)
+        self.assertEqual("Main Road", text_data.address.house)
+        self.assertEqual("4-83", text_data.address.street)